@@ -1,26 +1,44 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from sklearn.neighbors import NearestNeighbors
-import plotly.express as px
+import csv
 from datetime import datetime
 from pathlib import Path
+import os
+import tempfile
 import time
+from theme import inject_css, card, progress_bar
+# pandas, numpy, sklearn and plotly are imported lazily after the login gate
 
 # ---------- BASIC FILES ----------
 USERS_FILE = Path("users.csv")
 WEIGHT_FILE = Path("weight_history.csv")
 WATER_FILE = Path("water_history.csv")
 WORKOUT_FILE = Path("workout_history.csv")
+FORECAST_FILE = Path("weight_forecast.csv")
+USER_COLUMNS = ["email", "password", "name"]
+HISTORY_FILES = {"weight": WEIGHT_FILE, "water": WATER_FILE, "workout": WORKOUT_FILE}
+ADMIN_EMAILS = {e.strip() for e in os.environ.get("FITNESS_ADMIN_EMAILS", "").split(",") if e.strip()}
+
 
+def write_csv_atomic(df, path):
+    # Write a sibling temp file, then swap it in: readers (e.g. the export thread)
+    # see either the old file or the new one, never a half-written one
+    with tempfile.NamedTemporaryFile("w", dir=path.parent or ".", prefix=f".{path.name}.", suffix=".tmp",
+                                     delete=False, newline="", encoding="utf-8") as tmp:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp.name, path)
 
 def load_users():
+    # stdlib csv so the login screen renders without importing pandas
     if USERS_FILE.exists():
-        return pd.read_csv(USERS_FILE)
-    return pd.DataFrame(columns=["email", "password", "name"])
+        with open(USERS_FILE, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    return []
 
-def save_users(df):
-    df.to_csv(USERS_FILE, index=False)
+def save_users(users):
+    with open(USERS_FILE, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=USER_COLUMNS)
+        writer.writeheader()
+        writer.writerows(users)
 
 def load_weight_history():
     if WEIGHT_FILE.exists():
@@ -28,7 +46,7 @@ def load_weight_history():
     return pd.DataFrame(columns=["email", "date", "weight", "bmi"])
 
 def save_weight_history(df):
-    df.to_csv(WEIGHT_FILE, index=False)
+    write_csv_atomic(df, WEIGHT_FILE)
 def save_water_history(water_ml, user_email):
     water_df = pd.read_csv(WATER_FILE) if WATER_FILE.exists() else pd.DataFrame()
     new_row = pd.DataFrame({
@@ -36,7 +54,7 @@ def save_water_history(water_ml, user_email):
         "water_ml": [water_ml]
     })
     water_df = pd.concat([water_df, new_row], ignore_index=True)
-    water_df.to_csv(WATER_FILE, index=False)
+    write_csv_atomic(water_df, WATER_FILE)
 
 def save_workout_history(exercise, duration_sec, user_email):
     workout_df = pd.read_csv(WORKOUT_FILE) if WORKOUT_FILE.exists() else pd.DataFrame()
@@ -45,42 +63,13 @@ def save_workout_history(exercise, duration_sec, user_email):
         "exercise": [exercise], "duration_sec": [duration_sec]
     })
     workout_df = pd.concat([workout_df, new_row], ignore_index=True)
-    workout_df.to_csv(WORKOUT_FILE, index=False)
+    write_csv_atomic(workout_df, WORKOUT_FILE)
 
 
 # ---------- PAGE CONFIG & THEME ----------
 st.set_page_config(page_title="AI Fitness Dashboard", layout="wide")
 
-st.markdown("""
-<style>
-.stApp {background: radial-gradient(circle at top left, #e0f2fe, #eef2ff 45%, #f9fafb 80%); color: #0f172a; font-family: "Segoe UI", sans-serif;}
-.block-container {padding-top: 1.2rem; max-width: 1150px;}
-.card {background: #ffffff; padding: 18px 20px; border-radius: 18px; box-shadow: 0 12px 28px rgba(15,23,42,0.10); border: 1px solid #e5e7eb; transition: transform 0.18s ease;}
-.card:hover {transform: translateY(-4px); box-shadow: 0 18px 40px rgba(15,23,42,0.18);}
-.small-text {font-size: 0.9rem; color: #6b7280;}
-.top-bar {display: flex; justify-content: space-between; align-items: center; gap: 1rem;}
-.top-title {font-size: 1.8rem; font-weight: 700;}
-.top-right-box {background: #0f172a; color: #e5e7eb; padding: 10px 14px; border-radius: 12px; font-size: 0.9rem;}
-.macro-card {background: linear-gradient(135deg, #10b981, #059669); color: white; padding: 16px; border-radius: 16px; text-align: center;}
-.progress-card {background: linear-gradient(135deg, #3b82f6, #1d4ed8); color: white; padding: 16px; border-radius: 16px;}
-.timer-card {background: linear-gradient(135deg, #ef4444, #dc2626); color: white; padding: 20px; border-radius: 16px; text-align: center;}
-.water-card {background: linear-gradient(135deg, #06b6d4, #0891b2); color: white; padding: 20px; border-radius: 16px;}
-.chart-card {background: linear-gradient(135deg, #8b5cf6, #7c3aed); color: white; padding: 20px; border-radius: 16px;}
-/* DARK MODE TOGGLE */
-.dark-mode .stApp {background: linear-gradient(135deg, #0f0f23, #1a1a2e 50%, #16213e 100%);}
-.dark-mode .card {background: #1e1e2e; color: #e5e7eb; border: 1px solid #374151;}
-.dark-mode {color: #f9fafb;}
-
-/* MOBILE RESPONSIVE */
-@media (max-width: 768px) {
-    .top-title {font-size: 1.4rem;}
-    .stTabs [data-baseweb="tab-list"] {overflow-x: auto;}
-    .stTabs [role="tab"] {min-width: 80px; padding: 8px 12px;}
-    button {padding: 12px 20px !important; font-size: 16px !important;}
-    .metric-container {font-size: 1.2rem !important;}
-}
-</style>
-""", unsafe_allow_html=True)
+inject_css("style.css")
 # ===== SESSION STATE INITIALIZATION =====
 if 'water_ml' not in st.session_state:
     st.session_state.water_ml = 0
@@ -99,23 +88,13 @@ if 'bmi' not in st.session_state:
 # ========================================
 
 
-# ---------- DATA ----------
-@st.cache_data
-def load_food_data():
-    return pd.read_excel("foods.xlsx")
-
-food_df = load_food_data()
-features = food_df[['Calories', 'Protein', 'Fat', 'Carbs']]
-model = NearestNeighbors(n_neighbors=5)
-model.fit(features)
-
 # ---------- AUTH STATE ----------
 if "logged_in" not in st.session_state:
     st.session_state["logged_in"] = False
     st.session_state["user_email"] = None
     st.session_state["user_name"] = None
 
-users_df = load_users()
+users = load_users()
 
 # ---------- LOGIN / REGISTER ----------
 st.markdown("## 🔐 User Access")
@@ -128,11 +107,11 @@ if not st.session_state["logged_in"]:
         login_email = st.text_input("Email", key="login_email_v2")
         login_pass = st.text_input("Password", type="password", key="login_pass_v2")
         if st.button("Login", key="login_btn_v2"):
-            row = users_df[users_df["email"] == login_email]
-            if not row.empty and str(row.iloc[0]["password"]) == str(login_pass):
+            row = next((u for u in users if u["email"] == login_email), None)
+            if row is not None and str(row["password"]) == str(login_pass):
                 st.session_state["logged_in"] = True
                 st.session_state["user_email"] = login_email
-                st.session_state["user_name"] = row.iloc[0]["name"]
+                st.session_state["user_name"] = row["name"]
                 st.rerun()
             else:
                 st.error("❌ Invalid credentials")
@@ -144,10 +123,9 @@ if not st.session_state["logged_in"]:
         reg_pass = st.text_input("Password", type="password", key="reg_pass_v2")
         reg_pass2 = st.text_input("Confirm Password", type="password", key="reg_confirm_v2")
         if st.button("Register", key="register_btn_v2"):
-            if reg_pass == reg_pass2 and reg_email not in users_df["email"].values:
-                new_row = pd.DataFrame({"email": [reg_email], "password": [reg_pass], "name": [reg_name]})
-                users_df = pd.concat([users_df, new_row], ignore_index=True)
-                save_users(users_df)
+            if reg_pass == reg_pass2 and all(u["email"] != reg_email for u in users):
+                users.append({"email": reg_email, "password": reg_pass, "name": reg_name})
+                save_users(users)
                 st.success("✅ Registered! Please login.")
             else:
                 st.error("❌ Passwords don't match or email exists")
@@ -161,6 +139,24 @@ else:
 if not st.session_state["logged_in"]:
     st.stop()
 
+# ---------- HEAVY IMPORTS (logged-in only) ----------
+import pandas as pd
+from exporter import ExportJob, EXPORT_FORMATS
+from forecast import ensure_forecast_state, save_forecast_state, record_weight, weeks_to_target
+
+# ---------- DATA ----------
+@st.cache_data
+def load_food_data():
+    return pd.read_excel("foods.xlsx")
+
+@st.cache_resource
+def load_food_model():
+    from sklearn.neighbors import NearestNeighbors
+    features = load_food_data()[['Calories', 'Protein', 'Fat', 'Carbs']]
+    return NearestNeighbors(n_neighbors=5).fit(features)
+
+food_df = load_food_data()
+
 # ---------- DASHBOARD ----------
 today_str = datetime.now().strftime("%d %b %Y")
 user_name = st.session_state.get("user_name", "User")
@@ -199,13 +195,7 @@ allergies = st.sidebar.text_input("Food Allergies", key="allergies_v2")
 veg_only = st.sidebar.checkbox("Vegetarian Only 🥦", key="veg_v2")
 st.sidebar.markdown("---")
 if st.sidebar.checkbox("🌙 Dark Mode"):
-    st.markdown("""
-    <style>
-    .stApp {background: linear-gradient(135deg, #0f0f23, #1a1a2e, #16213e);}
-    .card {background: #1e1e2e !important; color: #e5e7eb !important;}
-    section[data-testid="stSidebar"] {background: #1a1a2e;}
-    </style>
-    """, unsafe_allow_html=True)
+    inject_css("dark.css")
 st.sidebar.markdown("---")
 if st.sidebar.button("🎬 VIVA DEMO MODE", key="demo_mode"):
     # Auto-fill impressive demo data
@@ -223,6 +213,8 @@ st.sidebar.subheader("🍽️ Calorie Tracker")
 cal_eaten_today = st.sidebar.number_input("Calories eaten today", 0.0, 5000.0, 0.0, key="cal_eaten_v2")
 
 weight_history = load_weight_history()
+# One-off batch fit for existing users; later entries update the state incrementally
+forecast_states = ensure_forecast_state(FORECAST_FILE, weight_history)
 
 if st.sidebar.button("💾 Save Weight Entry", key="save_weight_v2"):
     bmi_today = weight / (height ** 2) if height > 0 else 0
@@ -234,6 +226,8 @@ if st.sidebar.button("💾 Save Weight Entry", key="save_weight_v2"):
     })
     weight_history = pd.concat([weight_history, new_row], ignore_index=True)
     save_weight_history(weight_history)
+    forecast_states = record_weight(forecast_states, st.session_state["user_email"], new_row["date"][0], weight)
+    save_forecast_state(forecast_states, FORECAST_FILE)
     st.sidebar.success("✅ Saved to history!")
 
 if st.sidebar.button("✨ Generate Plan", key="generate_v2"):
@@ -254,8 +248,11 @@ cal_goal = tdee * goal_factor
 cal_remaining = max(0, cal_goal - cal_eaten_today)
 cal_progress = min(cal_eaten_today / cal_goal, 1.0)
 
-# Goal estimator
-weeks_to_goal = abs(weight - target_weight) / (0.5 if goal == "Weight Loss" else 0.25)
+# Goal estimator: data-driven ETA from the saved weight trend, fixed rate otherwise
+user_forecast = forecast_states[forecast_states["email"] == st.session_state["user_email"]]
+forecast_weeks = weeks_to_target(user_forecast.iloc[0].to_dict(), target_weight) if not user_forecast.empty else None
+eta_from_trend = forecast_weeks is not None
+weeks_to_goal = forecast_weeks if eta_from_trend else abs(weight - target_weight) / (0.5 if goal == "Weight Loss" else 0.25)
 
 # Macros
 macro_rules = {
@@ -273,28 +270,18 @@ st.markdown("### 📊 Today's Dashboard")
 c1, c2, c3, c4 = st.columns(4)
 
 with c1:
-    st.markdown('<div class="card">', unsafe_allow_html=True)
     status = "🔴 Overweight" if bmi > 25 else "🟢 Normal" if bmi > 18.5 else "🟡 Underweight"
-    st.markdown(f"**BMI**<h3>{bmi:.1f}</h3><p>{status}</p>", unsafe_allow_html=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+    card(f"<strong>BMI</strong><h3>{bmi:.1f}</h3><p>{status}</p>")
 
 with c2:
-    st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.markdown("**Daily Calories**")
-    st.metric("", f"{cal_goal:.0f}")
-    st.markdown("</div>", unsafe_allow_html=True)
+    card(f"<strong>Daily Calories</strong><h3>{cal_goal:.0f}</h3>")
 
 with c3:
-    st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.markdown("**Goal Progress**")
-    st.metric("", f"{weeks_to_goal:.0f} weeks")
-    st.markdown("</div>", unsafe_allow_html=True)
+    eta_note = "📈 Based on your weight trend" if eta_from_trend else "📏 Estimated at a fixed weekly rate"
+    card(f'<strong>Goal Progress</strong><h3>{weeks_to_goal:.0f} weeks</h3><p class="card-note">{eta_note}</p>')
 
 with c4:
-    st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.markdown("**Activity**")
-    st.metric("", activity)
-    st.markdown("</div>", unsafe_allow_html=True)
+    card(f"<strong>Activity</strong><h3>{activity}</h3>")
 
 st.markdown("---")
 
@@ -303,22 +290,17 @@ st.markdown("### 🍽️ Calorie Tracker")
 col1, col2 = st.columns(2)
 
 with col1:
-    st.markdown('<div class="progress-card">', unsafe_allow_html=True)
-    st.markdown(f"**Eaten Today**<h3>{cal_eaten_today:.0f}</h3>")
-    st.markdown(f"**Goal: {cal_goal:.0f}**")
-    st.progress(cal_progress)
-    st.markdown("</div>", unsafe_allow_html=True)
+    card(f"<strong>Eaten Today</strong><h3>{cal_eaten_today:.0f}</h3>"
+         f"<strong>Goal: {cal_goal:.0f}</strong>{progress_bar(cal_progress)}", cls="progress-card")
 
 with col2:
-    st.markdown('<div class="progress-card">', unsafe_allow_html=True)
-    st.markdown(f"**Remaining**<h2>{cal_remaining:.0f}</h2>")
     if cal_remaining < 0:
-        st.markdown("🔴 **OVER TARGET**")
+        pace = "🔴 <strong>OVER TARGET</strong>"
     elif cal_remaining < cal_goal * 0.2:
-        st.markdown("🟡 **Almost done!**")
+        pace = "🟡 <strong>Almost done!</strong>"
     else:
-        st.markdown("🟢 **On track!**")
-    st.markdown("</div>", unsafe_allow_html=True)
+        pace = "🟢 <strong>On track!</strong>"
+    card(f"<strong>Remaining</strong><h2>{cal_remaining:.0f}</h2>{pace}", cls="progress-card")
 
 # Calorie status message
 if cal_remaining < 0:
@@ -333,9 +315,9 @@ else:
 # ---------- MACRO CARDS ----------
 st.markdown("### 🥗 Macronutrient Targets")
 m1, m2, m3 = st.columns(3)
-with m1: st.markdown(f'<div class="macro-card">🍗 Protein<br><strong>{protein_g:.0f}g</strong></div>', unsafe_allow_html=True)
-with m2: st.markdown(f'<div class="macro-card">🍚 Carbs<br><strong>{carb_g:.0f}g</strong></div>', unsafe_allow_html=True)
-with m3: st.markdown(f'<div class="macro-card">🥑 Fat<br><strong>{fat_g:.0f}g</strong></div>', unsafe_allow_html=True)
+with m1: card(f"🍗 Protein<br><strong>{protein_g:.0f}g</strong>", cls="macro-card")
+with m2: card(f"🍚 Carbs<br><strong>{carb_g:.0f}g</strong>", cls="macro-card")
+with m3: card(f"🥑 Fat<br><strong>{fat_g:.0f}g</strong>", cls="macro-card")
 
 # ---------- TABS ----------
 tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11, tab12, tab13 = st.tabs([
@@ -347,6 +329,7 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11, tab12, tab13
 
 
 with tab1:
+    import plotly.express as px
     history_user = weight_history[weight_history["email"] == st.session_state["user_email"]]
     if history_user.empty:
         st.info("👈 Save weight entries from sidebar to track your progress!")
@@ -356,6 +339,8 @@ with tab1:
 
 with tab2:
     st.markdown("### 🍳 Smart Meal Recommendations")
+    import numpy as np
+    model = load_food_model()
     meals = [("Breakfast 🍳", cal_goal * 0.3), ("Lunch 🍛", cal_goal * 0.4), ("Dinner 🌙", cal_goal * 0.3)]
     for meal_name, meal_cal in meals:
         st.markdown(f"#### {meal_name}")
@@ -462,6 +447,7 @@ with tab6:
         st.balloons()
         st.success("🎉 3L Goal Reached! 💦")
 with tab7:
+    import plotly.express as px
     st.markdown("### 📊 Weekly Progress Charts")
     
     # Weekly Summary Cards - FIXED
@@ -523,6 +509,56 @@ with tab8:
             mime="text/plain"
         )
         st.success("✅ PDF Report Ready! Click Download!")
+
+    # ---------- DATA EXPORT ----------
+    st.markdown("### 📦 Export Full History")
+    is_admin = st.session_state["user_email"] in ADMIN_EMAILS
+    col1, col2 = st.columns(2)
+    with col1:
+        export_fmt = st.selectbox("Format", list(EXPORT_FORMATS), key="export_fmt")
+    with col2:
+        export_scope = st.selectbox("Scope", ["My data", "All users (admin)"] if is_admin else ["My data"], key="export_scope")
+
+    if st.button("📦 START EXPORT", use_container_width=True):
+        old_job = st.session_state.get("export_job")
+        if old_job is not None:
+            old_job.cleanup()
+        export_email = None if export_scope.startswith("All") else st.session_state["user_email"]
+        st.session_state.export_job = ExportJob(HISTORY_FILES, export_fmt, export_email).start()
+
+    export_running = "export_job" in st.session_state and not st.session_state.export_job.done
+
+    # Polls only while the export runs; a full rerun on completion drops run_every
+    @st.fragment(run_every=1 if export_running else None)
+    def export_status():
+        job = st.session_state.get("export_job")
+        if job is None:
+            return
+        if not job.done:
+            st.progress(job.progress)
+            st.caption(f"Exporting... {job.progress * 100:.0f}%")
+        elif export_running:
+            st.rerun()
+        elif job.error:
+            st.error(f"❌ Export failed: {job.error}")
+        else:
+            ext, mime = EXPORT_FORMATS[job.fmt]
+            scope_name = job.email or "all_users"
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label=f"📥 DOWNLOAD {job.fmt}",
+                    data=job.read_bytes,
+                    file_name=f"{scope_name}_fitness_history_{datetime.now().strftime('%Y%m%d')}.{ext}",
+                    mime=mime
+                )
+            with col2:
+                if st.button("🗑️ Clear export", key="export_clear"):
+                    job.cleanup()
+                    del st.session_state.export_job
+                    st.rerun()
+
+    export_status()
 with tab9:
     st.markdown("### 🏆 Your Achievements")
     
@@ -541,9 +577,9 @@ with tab9:
     for i, (name, unlocked) in enumerate(achievements.items()):
         with col1 if i%2==0 else col2:
             if unlocked:
-                st.markdown(f'<div style="background: linear-gradient(45deg, gold, orange); padding: 15px; border-radius: 12px; text-align: center;"><h3>🏆 {name}</h3><p>✅ UNLOCKED!</p></div>', unsafe_allow_html=True)
+                card(f"<h3>🏆 {name}</h3><p>✅ UNLOCKED!</p>", cls="award-card")
             else:
-                st.markdown(f'<div style="background: #f3f4f6; padding: 15px; border-radius: 12px; text-align: center;"><h4>🔒 {name}</h4></div>', unsafe_allow_html=True)
+                card(f"<h4>🔒 {name}</h4>", cls="award-locked")
 with tab10:
     st.markdown("### 🎮 Gamification Dashboard")
     
@@ -711,7 +747,8 @@ with tab13:
     """
     
     # WhatsApp share
-    whatsapp_url = f"https://wa.me/?text={share_text.replace('\n', '%0A')}"
+    share_encoded = share_text.replace('\n', '%0A')
+    whatsapp_url = f"https://wa.me/?text={share_encoded}"
     st.markdown(f"[📱 Share on WhatsApp]({whatsapp_url})")
     
     # PDF share (existing PDF content)
@@ -0,0 +1,78 @@
+"""Measure what one logged-in dashboard rerun sends to the browser.
+
+Runs app.py headlessly with streamlit's AppTest in a scratch directory and
+reports the element count and serialized protobuf bytes of the rendered
+tree (a proxy for the per-rerun websocket payload) plus the script time.
+The repo's .streamlit/config.toml is applied; --inline-css turns static
+serving off to measure the inlined-stylesheet fallback instead.
+
+    python benchmarks/render_payload.py [--runs 5] [--inline-css]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from streamlit import config
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from walk(child)
+
+
+def measure(runs, inline_css=False):
+    workdir = Path(tempfile.mkdtemp(prefix="fitness_bench_"))
+    shutil.copy(ROOT / "foods.xlsx", workdir)
+    shutil.copytree(ROOT / ".streamlit", workdir / ".streamlit")
+    (workdir / "users.csv").write_text("email,password,name\nbench@example.com,bench,Bench\n")
+    os.chdir(workdir)
+    config.get_config_options(force_reparse=True)
+    if inline_css:
+        config.set_option("server.enableStaticServing", False)
+    try:
+        at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+        at.session_state["logged_in"] = True
+        at.session_state["user_email"] = "bench@example.com"
+        at.session_state["user_name"] = "Bench"
+        timings, sizes, counts, html_sizes = [], [], [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - start)
+            elements = [n for n in walk(at._tree) if getattr(n, "proto", None) is not None]
+            sizes.append(sum(n.proto.ByteSize() for n in elements))
+            counts.append(len(elements))
+            html_sizes.append(sum(n.proto.ByteSize() for n in elements
+                                  if n.type == "markdown" and n.proto.allow_html))
+        return {
+            "elements": counts[-1],
+            "payload_bytes": sizes[-1],
+            "html_bytes": html_sizes[-1],
+            "script_ms": statistics.median(timings) * 1000,
+        }
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--inline-css", action="store_true")
+    args = parser.parse_args()
+    result = measure(args.runs, args.inline_css)
+    for key, value in result.items():
+        print(f"{key:>14}: {value:.1f}" if isinstance(value, float) else f"{key:>14}: {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
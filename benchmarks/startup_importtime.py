@@ -0,0 +1,118 @@
+"""Track how much import time a fresh app process pays before the login screen.
+
+Runs app.py once through streamlit's AppTest in a fresh `python -X importtime`
+process (no session, so the script stops at the login gate). Only imports
+made after the harness is loaded are counted (so streamlit's own import cost
+is excluded); their top-level cumulative times are summed and one JSON line
+is appended to startup_history.jsonl. A run whose script raises or never
+reaches the login gate aborts the benchmark instead of being recorded.
+
+    python benchmarks/startup_importtime.py [--runs 3] [--top 8] [--no-record] [--root DIR]
+
+--root measures another checkout (e.g. a `git worktree` of an older commit).
+"""
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent
+HISTORY_FILE = Path(__file__).resolve().parent / "startup_history.jsonl"
+MARKER = "--- app start ---"
+# numpy is left out: it is imported inside pandas, so it never shows up at top level
+TRACKED = ["streamlit", "pandas", "sklearn", "plotly", "pyarrow"]
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"; top level has no indent
+    top = {}
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            continue
+        top[name.strip()] = int(cumulative)
+    return top
+
+
+def package_time(top, package):
+    # Time first paid for a package at top level; 0 means it was not imported or came in nested
+    return sum(us for name, us in top.items() if name.split(".")[0] == package)
+
+
+def run_once(root, workdir):
+    # Bare `python app.py` ignores st.stop(), so drive the real script runner instead
+    code = (
+        "import sys\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"sys.stderr.write({MARKER!r} + '\\n')\n"
+        f"at = AppTest.from_file({str(root / 'app.py')!r}, default_timeout=120)\n"
+        "at.run()\n"
+        "assert not at.exception, [e.message for e in at.exception]\n"
+        "assert any('Login' in t.label for t in at.tabs), 'login gate not rendered'\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=workdir, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        errors = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        raise SystemExit("app.py did not reach the login gate:\n" + "\n".join(errors[-20:]))
+    return parse_importtime(proc.stderr)
+
+
+def git_rev(root):
+    # The history file itself is tracked, so it must not mark the tree dirty
+    git = lambda *cmd: subprocess.run(["git", *cmd], cwd=root, capture_output=True, text=True).stdout.strip()
+    rev = git("rev-parse", "--short", "HEAD")
+    if rev and git("status", "--porcelain", "--untracked-files=no", "--", ".", f":!{HISTORY_FILE.relative_to(DEFAULT_ROOT)}"):
+        rev += "-dirty"
+    return rev or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--no-record", action="store_true")
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="fitness_startup_"))
+    root = args.root.resolve()
+    shutil.copy(root / "foods.xlsx", workdir)
+    try:
+        runs = [run_once(root, workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    totals = [sum(r.values()) for r in runs]
+    best = runs[totals.index(min(totals))]
+    record = {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "commit": git_rev(root),
+        "python": sys.version.split()[0],
+        "total_ms": round(statistics.median(totals) / 1000, 1),
+        "modules_ms": {m: round(package_time(best, m) / 1000, 1) for m in TRACKED},
+    }
+
+    print(f"startup imports: {record['total_ms']:.1f} ms (median of {args.runs})")
+    for name, us in sorted(best.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    if not args.no_record:
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"recorded -> {HISTORY_FILE.relative_to(DEFAULT_ROOT)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import io
+import json
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+
+import pandas as pd
+
+# ---------- EXPORT SETTINGS ----------
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_COLUMNS = ["kind", "email", "date", "weight", "bmi", "water_ml", "exercise", "duration_sec"]
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "JSON": ("json", "application/json"),
+    "Parquet": ("parquet", "application/octet-stream"),
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def count_rows(sources):
+    total = 0
+    for path in sources.values():
+        if Path(path).exists():
+            with open(path, "rb") as f:
+                total += max(sum(1 for _ in f) - 1, 0)
+    return total
+
+
+def iter_history_chunks(sources, email=None, chunksize=EXPORT_CHUNK_ROWS):
+    # sources: {"weight": WEIGHT_FILE, ...}; email=None exports every user (admin dump)
+    for kind, path in sources.items():
+        if not Path(path).exists():
+            continue
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            rows_read = len(chunk)
+            if email is not None:
+                chunk = chunk[chunk["email"] == email]
+            chunk = chunk.assign(kind=kind).reindex(columns=EXPORT_COLUMNS)
+            yield chunk, rows_read
+
+
+def iter_csv(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+    if header:
+        yield ",".join(EXPORT_COLUMNS) + "\n"
+
+
+def iter_json(chunks):
+    yield "["
+    first = True
+    for chunk in chunks:
+        for record in json.loads(chunk.to_json(orient="records")):
+            yield ("" if first else ",") + json.dumps(record, ensure_ascii=False)
+            first = False
+    yield "]"
+
+
+def write_parquet(chunks, out):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ("kind", pa.string()), ("email", pa.string()), ("date", pa.string()),
+        ("weight", pa.float64()), ("bmi", pa.float64()), ("water_ml", pa.float64()),
+        ("exercise", pa.string()), ("duration_sec", pa.float64()),
+    ])
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            chunk = chunk.astype({c: "object" for c in ("kind", "email", "date", "exercise")})
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_export(sources, fmt, out, email=None, on_progress=None):
+    total = count_rows(sources) or 1
+    done = 0
+
+    def tracked():
+        nonlocal done
+        for chunk, rows_read in iter_history_chunks(sources, email):
+            yield chunk
+            done += rows_read
+            if on_progress:
+                on_progress(min(done / total, 1.0))
+
+    if fmt == "Parquet":
+        write_parquet(tracked(), out)
+    else:
+        pieces = iter_csv(tracked()) if fmt == "CSV" else iter_json(tracked())
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        for piece in pieces:
+            text.write(piece)
+        text.flush()
+        text.detach()
+    if on_progress:
+        on_progress(1.0)
+
+
+class ExportJob:
+    """Runs write_export in a background thread into a temp file and tracks progress.
+
+    A finished export stays on disk until cleanup() (or until the job is garbage
+    collected with its session); failed or cancelled exports are removed at once.
+    """
+
+    def __init__(self, sources, fmt, email=None):
+        self.fmt = fmt
+        self.email = email
+        self.progress = 0.0
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        ext = EXPORT_FORMATS[fmt][0]
+        tmp = tempfile.NamedTemporaryFile(prefix="fitness_export_", suffix=f".{ext}", delete=False)
+        tmp.close()
+        self.path = Path(tmp.name)
+        self._lock = threading.Lock()
+        self._remove_file = weakref.finalize(self, self.path.unlink, missing_ok=True)
+        self._thread = threading.Thread(target=self._run, args=(sources,), daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self, sources):
+        try:
+            with open(self.path, "wb") as out:
+                write_export(sources, self.fmt, out, self.email, self._set_progress)
+        except ExportCancelled:
+            pass
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._lock:
+                if self.cancelled or self.error:
+                    self._remove_file()
+                self.done = True
+
+    def _set_progress(self, value):
+        if self.cancelled:
+            raise ExportCancelled()
+        self.progress = value
+
+    def read_bytes(self):
+        # Passed as a callable to st.download_button, so it only runs on click
+        return self.path.read_bytes()
+
+    def cleanup(self):
+        # Safe in any state: a running export stops at its next chunk and drops its result
+        with self._lock:
+            self.cancelled = True
+            if self.done:
+                self._remove_file()
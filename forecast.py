@@ -0,0 +1,149 @@
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ---------- FORECAST SETTINGS ----------
+# Holt's linear exponential smoothing: level = smoothed weight, trend = kg per day
+ALPHA = 0.5
+BETA = 0.3
+# A trend-based ETA needs this much data; otherwise the app uses its fixed-rate estimate
+MIN_ENTRIES = 3
+MIN_SPAN_DAYS = 14
+MAX_TREND = 1.5 / 7          # kg per day; day-to-day water swings otherwise read as huge trends
+MAX_PROJECT_DAYS = 7         # how far past the last entry the level is carried forward
+MAX_WEEKS = 520
+STALE_DAYS = 30
+# prev_* is the state before the latest day, so a same-day re-save can redo that day
+STATE_COLUMNS = ["email", "level", "trend", "first_date", "last_date", "n",
+                 "prev_level", "prev_trend", "prev_date", "prev_n"]
+
+
+def load_forecast_state(path):
+    if Path(path).exists():
+        return pd.read_csv(path)
+    return pd.DataFrame(columns=STATE_COLUMNS)
+
+def save_forecast_state(df, path):
+    df.to_csv(path, index=False)
+
+def ensure_forecast_state(path, weight_history):
+    # Batch-fit from the full history when the state file is missing or has an older layout
+    states = load_forecast_state(path)
+    if not weight_history.empty and (not Path(path).exists() or list(states.columns) != STATE_COLUMNS):
+        states = fit_all(weight_history)
+        save_forecast_state(states, path)
+    return states
+
+
+def _days_between(start, end):
+    return (datetime.strptime(str(end), "%Y-%m-%d") - datetime.strptime(str(start), "%Y-%m-%d")).days
+
+
+def _step(state, date, weight):
+    if state is None or int(state["n"]) == 0:
+        return {"level": float(weight), "trend": 0.0, "first_date": date, "last_date": date, "n": 1,
+                "prev_level": np.nan, "prev_trend": np.nan, "prev_date": np.nan, "prev_n": 0}
+    dt = _days_between(state["last_date"], date)
+    level, trend = float(state["level"]), float(state["trend"])
+    if int(state["n"]) == 1:
+        new_level = float(weight)
+        new_trend = (new_level - level) / dt
+    else:
+        new_level = ALPHA * weight + (1 - ALPHA) * (level + trend * dt)
+        new_trend = BETA * (new_level - level) / dt + (1 - BETA) * trend
+    new_trend = float(np.clip(new_trend, -MAX_TREND, MAX_TREND))
+    return {"level": new_level, "trend": new_trend, "first_date": state["first_date"], "last_date": date,
+            "n": int(state["n"]) + 1,
+            "prev_level": level, "prev_trend": trend, "prev_date": state["last_date"], "prev_n": int(state["n"])}
+
+
+def update_state(state, date, weight):
+    # state: dict row for one user or None; returns the new state dict (O(1) per entry)
+    if state is not None and int(state["n"]) > 0 and _days_between(state["last_date"], date) <= 0:
+        # Same-day re-save replaces that day's entry: redo the update from the state before it
+        prev_n = int(state["prev_n"])
+        prev = {"level": state["prev_level"], "trend": state["prev_trend"], "first_date": state["first_date"],
+                "last_date": state["prev_date"], "n": prev_n} if prev_n > 0 else None
+        return _step(prev, date, weight)
+    return _step(state, date, weight)
+
+
+def record_weight(states, email, date, weight):
+    row = states[states["email"] == email]
+    state = row.iloc[0].to_dict() if not row.empty else None
+    new_state = update_state(state, date, weight)
+    new_state["email"] = email
+    states = states[states["email"] != email]
+    return pd.concat([states, pd.DataFrame([new_state])[STATE_COLUMNS]], ignore_index=True)
+
+
+def weeks_to_target(state, target_weight, today=None):
+    # None when there is too little, too short or too old data, or the trend is flat / moving away
+    if state is None or int(state["n"]) < MIN_ENTRIES:
+        return None
+    if _days_between(state["first_date"], state["last_date"]) < MIN_SPAN_DAYS:
+        return None
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    age = max(_days_between(state["last_date"], today), 0)
+    if age > STALE_DAYS:
+        return None
+    trend = float(state["trend"])
+    gap = target_weight - (float(state["level"]) + trend * min(age, MAX_PROJECT_DAYS))
+    if gap == 0:
+        return 0.0
+    if trend == 0 or np.sign(gap) != np.sign(trend):
+        return None
+    weeks = gap / trend / 7
+    return weeks if weeks <= MAX_WEEKS else None
+
+
+def fit_all(weight_history):
+    # Batch mode: runs the same recursion for every user at once, one step per entry index
+    if weight_history.empty:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+    hist = weight_history[["email", "date", "weight"]].dropna().copy()
+    # Same-day re-saves replace the earlier entry, as in update_state
+    hist = hist.drop_duplicates(["email", "date"], keep="last")
+    hist["date"] = pd.to_datetime(hist["date"], format="%Y-%m-%d")
+    hist = hist.sort_values(["email", "date"], kind="stable")
+    hist["step"] = hist.groupby("email").cumcount()
+
+    weights = hist.pivot(index="email", columns="step", values="weight").to_numpy(dtype=float)
+    days = hist.pivot(index="email", columns="step", values="date")
+    emails = days.index.to_numpy()
+    day_num = (days - pd.Timestamp("1970-01-01")).apply(lambda c: c.dt.days).to_numpy(dtype=float)
+    counts = hist.groupby("email").size().reindex(emails).to_numpy()
+
+    level = weights[:, 0].copy()
+    trend = np.zeros(len(emails))
+    last_day = day_num[:, 0].copy()
+    prev_level = np.full(len(emails), np.nan)
+    prev_trend = np.full(len(emails), np.nan)
+    prev_day = np.full(len(emails), np.nan)
+    prev_n = np.zeros(len(emails), dtype=int)
+    for step in range(1, weights.shape[1]):
+        w = weights[:, step]
+        active = ~np.isnan(w)
+        dt = day_num[:, step] - last_day
+        if step == 1:
+            new_level = w
+            new_trend = (w - level) / dt
+        else:
+            new_level = ALPHA * w + (1 - ALPHA) * (level + trend * dt)
+            new_trend = BETA * (new_level - level) / dt + (1 - BETA) * trend
+        new_trend = np.clip(new_trend, -MAX_TREND, MAX_TREND)
+        prev_level = np.where(active, level, prev_level)
+        prev_trend = np.where(active, trend, prev_trend)
+        prev_day = np.where(active, last_day, prev_day)
+        prev_n = np.where(active, step, prev_n)
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+        last_day = np.where(active, day_num[:, step], last_day)
+
+    to_date = lambda d: pd.to_datetime(d, unit="D").strftime("%Y-%m-%d")
+    prev_date = pd.Series(to_date(np.nan_to_num(prev_day)), dtype=object).where(prev_n > 0)
+    return pd.DataFrame({"email": emails, "level": level, "trend": trend, "first_date": to_date(day_num[:, 0]),
+                         "last_date": to_date(last_day), "n": counts,
+                         "prev_level": prev_level, "prev_trend": prev_trend, "prev_date": prev_date.to_numpy(), "prev_n": prev_n})
@@ -0,0 +1,43 @@
+import re
+from pathlib import Path
+
+import streamlit as st
+
+# ---------- STATIC ASSETS ----------
+# static/ is Streamlit's app static folder. With server.enableStaticServing (set in
+# .streamlit/config.toml) the browser fetches each stylesheet once over HTTP and
+# reruns only send a one-line @import; without it the CSS is inlined as a fallback.
+STATIC_DIR = Path(__file__).parent / "static"
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+@st.cache_data
+def _inline_css(name, mtime):
+    # mtime is part of the cache key so edits to static/*.css still hot-reload
+    return minify_css((STATIC_DIR / name).read_text(encoding="utf-8"))
+
+
+def inject_css(name):
+    mtime = (STATIC_DIR / name).stat().st_mtime_ns
+    if st.get_option("server.enableStaticServing"):
+        # ?v= changes on every edit, so the browser cache never serves a stale sheet
+        css = f'@import url("app/static/{name}?v={mtime}");'
+    else:
+        css = _inline_css(name, mtime)
+    st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+
+
+def card(body, cls="card"):
+    # Whole card as one element instead of separate open/close <div> markdown calls
+    st.markdown(f'<div class="{cls}">{body}</div>', unsafe_allow_html=True)
+
+
+def progress_bar(fraction):
+    return f'<div class="card-bar"><div style="width:{fraction * 100:.0f}%"></div></div>'